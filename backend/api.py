@@ -1,21 +1,33 @@
-from flask import Flask, jsonify, send_from_directory, request
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Imported before numpy and torch so it can size their BLAS / OpenMP thread pools
+from embedding_model import load_embedding_model
+
+from flask import Flask, Response, send_from_directory, request, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import json
-import os
+import orjson
+import re
 from collections import defaultdict
+import functools
 import glob
+import gzip
+import hashlib
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from dotenv import load_dotenv
+import diskcache
+try:
+    import faiss
+except ImportError:
+    faiss = None
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import HumanMessage
 
-# Load environment variables
-load_dotenv()
-
 app = Flask(__name__)
 
 # Configure CORS to allow requests from frontend
@@ -44,10 +56,10 @@ CORS(app,
 #      allow_headers=["Content-Type", "Authorization"],
 #      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
-# Initialize sentence transformer for embeddings
+# Initialize sentence transformer for embeddings (in-process or via embedding_service.py)
 print("Loading SentenceTransformer model...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-print("Model loaded successfully!")
+model, embedding_model_id = load_embedding_model()
+print(f"Model loaded successfully! ({embedding_model_id})")
 
 # Initialize Gemini LLM
 print("Initializing Google Gemini...")
@@ -62,6 +74,105 @@ except Exception as e:
     print(f"Failed to initialize Gemini: {e}")
     llm = None
 
+# Cache LLM analyses on disk, shared across workers and restarts
+LLM_CACHE_DIR = 'outputs/llm_cache'
+
+def open_llm_cache():
+    """Open the on-disk LLM analysis cache, or return None if it is unavailable"""
+    try:
+        return diskcache.Cache(LLM_CACHE_DIR)
+    except Exception as e:
+        print(f"Failed to open LLM cache: {e}")
+        return None
+
+llm_cache = open_llm_cache()
+
+def source_fingerprint(path):
+    """Hash a source file together with the embedding model it is encoded with"""
+    digest = hashlib.sha1(embedding_model_id.encode('utf-8'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def encode_texts(texts):
+    """Encode texts into L2-normalized embeddings so cosine similarity becomes a plain dot product"""
+    # encode() already sorts its inputs by length internally to minimize padding per batch
+    return model.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+def embedding_cache_path(source_path, cache_prefix, variant='norm'):
+    """Path of the embedding cache for the current version of a source file"""
+    return f"{cache_prefix}_emb_{variant}_{source_fingerprint(source_path)}.npy"
+
+def remove_stale_embedding_caches(cache_path):
+    """Delete caches of older source or model versions (and older formats) next to cache_path"""
+    cache_prefix = cache_path.rsplit('_emb_', 1)[0]
+    for stale_path in glob.glob(f"{glob.escape(cache_prefix)}_emb_*"):
+        if stale_path == cache_path or stale_path.endswith('.tmp'):
+            continue
+        try:
+            os.remove(stale_path)
+        except OSError as e:
+            print(f"Could not remove stale embedding cache {stale_path}: {e}")
+
+def load_cached_embeddings(cache_path, expected_rows):
+    """Memory-map cached embeddings, or return None when missing, stale or unreadable"""
+    if not os.path.exists(cache_path):
+        return None
+    
+    try:
+        embeddings = np.load(cache_path, mmap_mode='r')
+    except Exception as e:
+        print(f"Ignoring unreadable embedding cache {cache_path}: {e}")
+        return None
+    
+    if embeddings.dtype != np.float32 or embeddings.ndim != 2 or embeddings.shape[0] != expected_rows:
+        print(f"Ignoring stale embedding cache {cache_path}")
+        return None
+    
+    remove_stale_embedding_caches(cache_path)
+    return embeddings
+
+def save_embeddings(cache_path, embeddings):
+    """Write embeddings to the on-disk cache, tolerating read-only deployments"""
+    # Write to a temporary file first so readers never see a partially written cache
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, embeddings)
+        os.replace(tmp_path, cache_path)
+        remove_stale_embedding_caches(cache_path)
+    except OSError as e:
+        print(f"Could not write embedding cache {cache_path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def quantize_int8(embeddings):
+    """Symmetrically quantize embeddings to int8 with a single fp32 scale for the whole array"""
+    scale = float(np.abs(embeddings).max()) / 127 if embeddings.size else 0.0
+    if scale == 0.0:
+        return np.zeros(embeddings.shape, dtype=np.int8), 1.0
+    return np.round(embeddings / scale).astype(np.int8), scale
+
+def int8_similarities(embeddings_i8, scale, query):
+    """Approximate dot products of a normalized fp32 query with int8 embeddings (used when faiss is missing)"""
+    query_i8, query_scale = quantize_int8(query)
+    # Accumulate in int32 so 384-dim int8 products cannot overflow
+    return np.matmul(embeddings_i8, query_i8, dtype=np.int32) * (scale * query_scale)
+
+def load_or_encode_embeddings(texts, source_path, cache_prefix):
+    """Memory-map cached embeddings for texts, encoding and saving them on a cache miss"""
+    cache_path = embedding_cache_path(source_path, cache_prefix)
+    embeddings = load_cached_embeddings(cache_path, len(texts))
+    
+    if embeddings is None:
+        embeddings = encode_texts(texts)
+        save_embeddings(cache_path, embeddings)
+    
+    return embeddings
+
 # Load categories and create embeddings
 def load_categories():
     """Load categories and create embeddings"""
@@ -69,16 +180,110 @@ def load_categories():
         df = pd.read_csv('outputs/category.csv')
         categories = df['category'].tolist()
         
-        # Create embeddings for categories
-        category_embeddings = model.encode(categories)
+        # Create embeddings for categories (cached on disk per category.csv version)
+        category_embeddings = load_or_encode_embeddings(categories, 'outputs/category.csv', 'outputs/category')
         
         return categories, category_embeddings
     except Exception as e:
         print(f"Error loading categories: {e}")
         return [], []
 
-# Load categories and embeddings on startup
+KEYWORD_PHASES_SUFFIX = '_keyword_trend_phases.csv'
+
+def load_keyword_phase_data():
+    """Load the keyword trend phases of every third layer category as column arrays"""
+    keyword_data = {}
+    
+    for file_path in glob.glob(f'third_layer_data/*{KEYWORD_PHASES_SUFFIX}'):
+        category = os.path.basename(file_path)[:-len(KEYWORD_PHASES_SUFFIX)]
+        try:
+            df = pd.read_csv(file_path)
+            # Plain NumPy columns make per-request positional lookups cheap
+            keyword_data[category] = {
+                'keyword': df['keyword'].to_numpy(dtype=object),
+                'phase': df['phase'].to_numpy(dtype=object),
+                'velocity': df['velocity'].to_numpy(dtype=np.float64),
+                'engagement_rate': df['engagement_rate'].to_numpy(dtype=np.float64)
+            }
+        except Exception as e:
+            print(f"Error loading keyword trend phases from {file_path}: {e}")
+    
+    return keyword_data
+
+def load_all_keyword_embeddings(keyword_data):
+    """Memory-map the normalized keyword embeddings of every non-empty third layer category"""
+    keyword_embeddings = {}
+    pending = []  # (category, keywords, cache_path) for categories without a cache
+    
+    for category, keyword_columns in keyword_data.items():
+        file_path = f"third_layer_data/{category}{KEYWORD_PHASES_SUFFIX}"
+        try:
+            keywords = keyword_columns['keyword'].tolist()
+            if not keywords:
+                continue
+            
+            cache_path = embedding_cache_path(file_path, file_path[:-len('.csv')])
+            embeddings = load_cached_embeddings(cache_path, len(keywords))
+            if embeddings is None:
+                pending.append((category, keywords, cache_path))
+            else:
+                keyword_embeddings[category] = embeddings
+        except Exception as e:
+            print(f"Error loading keyword embeddings for {file_path}: {e}")
+    
+    if pending:
+        # Encode every uncached category in a single batched pass
+        try:
+            all_embeddings = encode_texts([kw for _, keywords, _ in pending for kw in keywords])
+        except Exception as e:
+            print(f"Error encoding keyword embeddings: {e}")
+            return keyword_embeddings
+        
+        offset = 0
+        for category, keywords, cache_path in pending:
+            embeddings = all_embeddings[offset:offset + len(keywords)]
+            offset += len(keywords)
+            save_embeddings(cache_path, embeddings)
+            keyword_embeddings[category] = embeddings
+    
+    return keyword_embeddings
+
+def build_keyword_indexes(keyword_embeddings):
+    """Index each category's keyword embeddings with 8-bit codes, in FAISS when it is installed"""
+    if faiss is None:
+        print("faiss not installed, searching keywords with NumPy")
+    
+    indexes = {}
+    for category, embeddings in keyword_embeddings.items():
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if faiss is None:
+            # One shared scale per category matrix, searched with an int8 GEMV
+            indexes[category] = quantize_int8(embeddings)
+            continue
+        
+        # Flat scan over 8-bit scalar-quantized codes: a quarter of the fp32 memory and bandwidth
+        index = faiss.IndexScalarQuantizer(embeddings.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        index.add(embeddings)
+        indexes[category] = index
+    
+    return indexes
+
+def search_keyword_index(index, query):
+    """Return the position and similarity of the indexed keyword nearest to a normalized query"""
+    if faiss is not None:
+        scores, ids = index.search(query[np.newaxis, :], 1)
+        return int(ids[0, 0]), float(scores[0, 0])
+    
+    embeddings_i8, scale = index
+    similarities = int8_similarities(embeddings_i8, scale, query)
+    best_idx = int(np.argmax(similarities))
+    return best_idx, float(similarities[best_idx])
+
+# Load categories and embeddings on startup; only the 8-bit keyword indexes stay resident
 categories_list, category_embeddings = load_categories()
+keyword_data_by_category = load_keyword_phase_data()
+keyword_indexes_by_category = build_keyword_indexes(load_all_keyword_embeddings(keyword_data_by_category))
 
 # Load data on startup
 def load_category_data():
@@ -99,41 +304,138 @@ def load_keyword_trends():
         print(f"Error loading keyword trends: {e}")
         return []
 
-def load_csv_data():
-    """Load data from all CSV files in second_layer_data"""
-    data = {}
-    csv_files = glob.glob('second_layer_data/*.csv')
-    
-    for file_path in csv_files:
-        try:
-            filename = os.path.basename(file_path).replace('.csv', '').replace('_', ' ')
-            
-            # Read a sample of the data (first 1000 rows for performance)
-            df = pd.read_csv(file_path, nrows=1000)
-            
-            # Convert to records
-            data[filename] = {
-                'total_rows': len(df),
-                'columns': list(df.columns),
-                'sample_data': df.head(10).to_dict('records')
-            }
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-            data[filename] = {'error': str(e)}
+def list_csv_files():
+    """Map display names of the second layer CSV files to their paths"""
+    csv_files = {}
+    for file_path in sorted(glob.glob('second_layer_data/*.csv')):
+        filename = os.path.basename(file_path).replace('.csv', '').replace('_', ' ')
+        csv_files[filename] = file_path
+    return csv_files
+
+@functools.lru_cache(maxsize=32)
+def load_csv_data(file_path):
+    """Load a sample of one second layer CSV file on first request (read errors propagate and are not cached)"""
+    # Read a sample of the data (first 1000 rows for performance)
+    df = pd.read_csv(file_path, nrows=1000)
     
-    return data
+    return {
+        'total_rows': len(df),
+        'columns': list(df.columns),
+        'sample_data': df.head(10).to_dict('records')
+    }
 
 # Load data on startup
 category_data = load_category_data()
 keyword_trends = load_keyword_trends()
-csv_data = load_csv_data()
+
+def flatten_keyword_trends():
+    """Flatten keyword trends into parallel NumPy arrays with one entry per keyword"""
+    keywords = []
+    category_ids = []
+    for i, cat in enumerate(keyword_trends):
+        for kw in cat.get('keywords', []):
+            keywords.append(kw)
+            category_ids.append(i)
+    
+    trends = np.array([kw.get('trend') for kw in keywords], dtype=object)
+    return {
+        'keywords': [kw.get('keyword', 'N/A') for kw in keywords],
+        'growth': np.fromiter((kw.get('growth_rate', 0) for kw in keywords), dtype=np.float64, count=len(keywords)),
+        'trend_up': trends == 'up',
+        'trend_down': trends == 'down',
+        'category_ids': np.array(category_ids, dtype=np.intp),
+    }
+
+# Flat keyword arrays used by the aggregate endpoints
+keyword_arrays = flatten_keyword_trends()
+
+# Keyword trends indexed by category name (first entry wins, as in a linear scan)
+keyword_trends_by_category = {}
+for trend_category in keyword_trends:
+    keyword_trends_by_category.setdefault(trend_category.get('category'), trend_category.get('keywords', []))
+
+# Category icons for the category breakdown
+BREAKDOWN_CATEGORY_ICONS = {
+    'Makeup & Cosmetics': '💄',
+    'Skincare & Anti-Aging': '🧴',
+    'Hair Coloring & Transformation': '💇‍♀️',
+    'Beauty Reviews & Brands': '⭐',
+    'Facial Care & Exercises': '✨',
+    'Hair Transformations & Makeovers': '💇',
+    'Men\'s Fashion & Style': '👔',
+    'General Beauty & Buzzwords': '🎯',
+    'Hair Styling & Men\'s Grooming': '✂️',
+    'Vlogs & Lifestyle': '📹'
+}
+
+# Category icons for the trend analysis page
+TREND_ANALYSIS_CATEGORY_ICONS = {
+    'Beauty Reviews & Brands': '⭐',
+    'General Beauty & Buzzwords': '🎯',
+    'Facial Care & Exercises': '✨',
+    'Hair Coloring & Transformation': '🎨',
+    'Hair Styling & Men\'s Grooming': '✂️',
+    'Hair Transformations & Makeovers': '💇',
+    'Makeup & Cosmetics': '💄',
+    'Men\'s Fashion & Style': '👔',
+    'Skincare & Anti-Aging': '🧴',
+    'Vlogs & Lifestyle': '📹'
+}
+
+def to_json_bytes(payload):
+    """Serialize a payload with orjson, including NumPy arrays and scalars"""
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def cached_json_response(body):
+    """Wrap a JSON body that was serialized once at startup in a response"""
+    return Response(body, mimetype='application/json')
+
+def json_response(payload):
+    """Serialize a payload with orjson and wrap it in a JSON response"""
+    return cached_json_response(to_json_bytes(payload))
+
+STATIC_CACHE_CONTROL = 'public, max-age=300, stale-while-revalidate=60'
+
+def cached_response(view):
+    """Serve an endpoint whose data only changes between deploys from a body built once,
+    with a weak ETag for 304 revalidation and a pre-gzipped copy"""
+    cache = {}
+    
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not cache:
+            response = view(*args, **kwargs)
+            body = response.get_data()
+            cache.update(
+                etag=hashlib.md5(body).hexdigest(),
+                body=body,
+                gzip_body=gzip.compress(body, compresslevel=6),
+                mimetype=response.mimetype
+            )
+        
+        if request.if_none_match.contains_weak(cache['etag']):
+            response = Response(status=304)
+        elif request.accept_encodings['gzip'] > 0:
+            response = Response(cache['gzip_body'], mimetype=cache['mimetype'])
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(cache['body'], mimetype=cache['mimetype'])
+        
+        response.set_etag(cache['etag'], weak=True)
+        response.headers['Cache-Control'] = STATIC_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+    
+    return wrapper
 
 @app.route('/api/categories')
+@cached_response
 def get_categories():
     """Get category performance data"""
-    return jsonify(category_data)
+    return json_response(category_data)
 
 @app.route('/api/trending-keywords')
+@cached_response
 def get_trending_keywords():
     """Get trending keywords data"""
     # Extract top trending keywords across all categories
@@ -144,81 +446,66 @@ def get_trending_keywords():
         keywords = category_info.get('keywords', [])
         
         for keyword_info in keywords:
-            keyword_info['category'] = category
-            all_keywords.append(keyword_info)
+            # Copy so the shared keyword_trends data served elsewhere is not modified
+            all_keywords.append({**keyword_info, 'category': category})
     
     # Sort by growth rate and return top 20
     sorted_keywords = sorted(all_keywords, key=lambda x: x.get('growth_rate', 0), reverse=True)[:20]
     
-    return jsonify(sorted_keywords)
+    return json_response(sorted_keywords)
 
-@app.route('/api/metrics')
-def get_metrics():
-    """Get overview metrics"""
-    total_keywords = sum(len(cat.get('keywords', [])) for cat in keyword_trends)
-    trending_up = sum(1 for cat in keyword_trends for kw in cat.get('keywords', []) if kw.get('trend') == 'up')
-    trending_down = sum(1 for cat in keyword_trends for kw in cat.get('keywords', []) if kw.get('trend') == 'down')
+def build_metrics():
+    """Compute overview metrics"""
+    growth = keyword_arrays['growth']
     
     # Get top growth rate
     top_growth = 0
     top_keyword = "N/A"
-    for cat in keyword_trends:
-        for kw in cat.get('keywords', []):
-            if kw.get('growth_rate', 0) > top_growth:
-                top_growth = kw.get('growth_rate', 0)
-                top_keyword = kw.get('keyword', 'N/A')
+    if len(growth) and growth.max() > 0:
+        top_idx = int(growth.argmax())
+        top_growth = float(growth[top_idx])
+        top_keyword = keyword_arrays['keywords'][top_idx]
     
     metrics = {
-        'total_keywords': total_keywords,
-        'trending_up': trending_up,
-        'trending_down': trending_down,
+        'total_keywords': len(growth),
+        'trending_up': int(keyword_arrays['trend_up'].sum()),
+        'trending_down': int(keyword_arrays['trend_down'].sum()),
         'top_growth_rate': f"{top_growth:.1f}%",
         'top_keyword': top_keyword
     }
     
-    return jsonify(metrics)
+    return metrics
 
-@app.route('/api/category-breakdown')
-def get_category_breakdown():
-    """Get detailed category breakdown"""
+metrics_json = to_json_bytes(build_metrics())
+
+@app.route('/api/metrics')
+@cached_response
+def get_metrics():
+    """Get overview metrics"""
+    return cached_json_response(metrics_json)
+
+def build_category_breakdown():
+    """Compute detailed category breakdown"""
     breakdown = []
     
     for category_data_item in category_data:
         category_name = category_data_item.get('category', '')
         
         # Find corresponding keyword trends
-        category_keywords = []
-        for trend_category in keyword_trends:
-            if trend_category.get('category') == category_name:
-                category_keywords = trend_category.get('keywords', [])
-                break
+        category_keywords = keyword_trends_by_category.get(category_name, [])
         
         # Calculate growth percentage
         growth_rate = 0
         if category_keywords:
             growth_rate = sum(kw.get('growth_rate', 0) for kw in category_keywords) / len(category_keywords)
         
-        # Map category name to icon
-        category_icons = {
-            'Makeup & Cosmetics': '💄',
-            'Skincare & Anti-Aging': '🧴',
-            'Hair Coloring & Transformation': '💇‍♀️',
-            'Beauty Reviews & Brands': '⭐',
-            'Facial Care & Exercises': '✨',
-            'Hair Transformations & Makeovers': '💇',
-            'Men\'s Fashion & Style': '👔',
-            'General Beauty & Buzzwords': '🎯',
-            'Hair Styling & Men\'s Grooming': '✂️',
-            'Vlogs & Lifestyle': '📹'
-        }
-        
         breakdown.append({
             'name': category_name,
             'count': len(category_keywords),
             'percentage': min(100, max(0, int(category_data_item.get('engagement_rate', 0) * 1000))),  # Scale engagement rate
             'growth': f"+{growth_rate:.1f}%" if growth_rate > 0 else f"{growth_rate:.1f}%",
             'trend': 'up' if growth_rate > 0 else 'down',
-            'icon': category_icons.get(category_name, '📊'),
+            'icon': BREAKDOWN_CATEGORY_ICONS.get(category_name, '📊'),
             'viewCount': int(category_data_item.get('viewCount', 0)),
             'likeCount': int(category_data_item.get('likeCount', 0)),
             'commentCount': int(category_data_item.get('commentCount', 0)),
@@ -228,48 +515,48 @@ def get_category_breakdown():
     # Sort by percentage (engagement rate scaled)
     breakdown.sort(key=lambda x: x['percentage'], reverse=True)
     
-    return jsonify(breakdown)
+    return breakdown
+
+category_breakdown_json = to_json_bytes(build_category_breakdown())
+
+@app.route('/api/category-breakdown')
+@cached_response
+def get_category_breakdown():
+    """Get detailed category breakdown"""
+    return cached_json_response(category_breakdown_json)
 
 @app.route('/api/csv-data')
+@cached_response
 def get_csv_data():
-    """Get information about all CSV files"""
-    return jsonify(csv_data)
+    """List the available category CSV files"""
+    return json_response(list(list_csv_files()))
 
 @app.route('/api/csv-data/<category>')
 def get_csv_category_data(category):
     """Get data for a specific category CSV file"""
     # Convert URL category back to filename format
     filename = category.replace('-', ' ').title()
+    csv_files = {name.title(): file_path for name, file_path in list_csv_files().items()}
     
-    if filename in csv_data:
-        return jsonify(csv_data[filename])
-    else:
-        return jsonify({'error': 'Category not found'}), 404
+    if filename not in csv_files:
+        return json_response({'error': 'Category not found'}), 404
+    
+    try:
+        return json_response(load_csv_data(csv_files[filename]))
+    except Exception as e:
+        print(f"Error loading {csv_files[filename]}: {e}")
+        return json_response({'error': str(e)}), 500
 
 @app.route('/api/keyword-trends-by-category')
+@cached_response
 def get_keyword_trends_by_category():
     """Get keyword trends organized by category"""
-    return jsonify(keyword_trends)
+    return json_response(keyword_trends)
 
-@app.route('/api/trend-analysis')
-def get_trend_analysis():
-    """Get comprehensive trend analysis data for the trending page"""
+def build_trend_analysis():
+    """Compute comprehensive trend analysis data for the trending page"""
     analysis_data = []
     
-    # Category icons mapping
-    category_icons = {
-        'Beauty Reviews & Brands': '⭐',
-        'General Beauty & Buzzwords': '🎯',
-        'Facial Care & Exercises': '✨',
-        'Hair Coloring & Transformation': '🎨',
-        'Hair Styling & Men\'s Grooming': '✂️',
-        'Hair Transformations & Makeovers': '💇',
-        'Makeup & Cosmetics': '💄',
-        'Men\'s Fashion & Style': '👔',
-        'Skincare & Anti-Aging': '🧴',
-        'Vlogs & Lifestyle': '📹'
-    }
-    
     # Calculate trend analysis for each category
     for i, category_data in enumerate(keyword_trends):
         category_name = category_data.get('category', '')
@@ -320,7 +607,7 @@ def get_trend_analysis():
             'category': category_name,
             'trend': category_trend,
             'change': change_str,
-            'icon': category_icons.get(category_name, '📊'),
+            'icon': TREND_ANALYSIS_CATEGORY_ICONS.get(category_name, '📊'),
             'rank': rank,
             'keywords': top_keywords,
             'avg_growth': avg_growth,
@@ -333,47 +620,56 @@ def get_trend_analysis():
     for i, item in enumerate(analysis_data):
         item['rank'] = i + 1
     
-    return jsonify(analysis_data)
+    return analysis_data
 
-@app.route('/api/trend-summary')
-def get_trend_summary():
-    """Get summary statistics for trending analysis"""
+trend_analysis_json = to_json_bytes(build_trend_analysis())
+
+@app.route('/api/trend-analysis')
+@cached_response
+def get_trend_analysis():
+    """Get comprehensive trend analysis data for the trending page"""
+    return cached_json_response(trend_analysis_json)
+
+def build_trend_summary():
+    """Compute summary statistics for trending analysis"""
     total_categories = len(keyword_trends)
-    categories_trending_up = 0
-    categories_trending_down = 0
-    all_growth_rates = []
-    hot_keywords_count = 0
+    growth = keyword_arrays['growth']
+    category_ids = keyword_arrays['category_ids']
     
-    for category_data in keyword_trends:
-        keywords = category_data.get('keywords', [])
-        if not keywords:
-            continue
-            
-        # Calculate average growth for category
-        avg_growth = sum(kw.get('growth_rate', 0) for kw in keywords) / len(keywords)
-        all_growth_rates.append(avg_growth)
-        
-        if avg_growth > 2:
-            categories_trending_up += 1
-        elif avg_growth < -2:
-            categories_trending_down += 1
-            
-        # Count hot keywords (growth > 10%)
-        hot_keywords_count += sum(1 for kw in keywords if kw.get('growth_rate', 0) > 10)
+    # Calculate average growth per category, skipping categories without keywords
+    counts = np.bincount(category_ids, minlength=total_categories)
+    growth_sums = np.bincount(category_ids, weights=growth, minlength=total_categories)
+    has_keywords = counts > 0
+    category_avg_growth = growth_sums[has_keywords] / counts[has_keywords]
+    
+    categories_trending_up = int((category_avg_growth > 2).sum())
+    categories_trending_down = int((category_avg_growth < -2).sum())
+    
+    # Count hot keywords (growth > 10%)
+    hot_keywords_count = int((growth > 10).sum())
     
     # Calculate overall statistics
-    highest_growth = max(kw.get('growth_rate', 0) for cat in keyword_trends for kw in cat.get('keywords', []))
-    avg_category_growth = sum(all_growth_rates) / len(all_growth_rates) if all_growth_rates else 0
+    highest_growth = float(growth.max()) if len(growth) else 0
+    avg_category_growth = float(category_avg_growth.mean()) if len(category_avg_growth) else 0
     percentage_trending_up = (categories_trending_up / total_categories * 100) if total_categories > 0 else 0
     
-    return jsonify({
+    return {
         'categories_trending_up_percentage': f"{percentage_trending_up:.0f}%",
         'highest_growth': f"+{highest_growth:.1f}%",
         'hot_keywords_count': hot_keywords_count,
         'avg_category_growth': f"+{avg_category_growth:.1f}%"
-    })
+    }
+
+trend_summary_json = to_json_bytes(build_trend_summary())
+
+@app.route('/api/trend-summary')
+@cached_response
+def get_trend_summary():
+    """Get summary statistics for trending analysis"""
+    return cached_json_response(trend_summary_json)
 
 @app.route('/api/growth-chart')
+@cached_response
 def get_growth_chart():
     """Get data for growth chart"""
     # Generate monthly growth data based on keyword trends
@@ -394,149 +690,314 @@ def get_growth_chart():
             'reach': max(0, int(base_value * 1.2 + variation + (i * 3)))
         })
     
-    return jsonify(chart_data)
+    return json_response(chart_data)
+
+MAX_KEYWORD_LENGTH = 200
+
+def get_request_keyword():
+    """Read the keyword from the JSON request body, returning (keyword, error_response)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'keyword' not in data:
+        return None, (json_response({'error': 'Keyword is required'}), 400)
+    
+    if not isinstance(data['keyword'], str):
+        return None, (json_response({'error': 'Keyword must be a string'}), 400)
+        
+    user_keyword = data['keyword'].strip()
+    if not user_keyword:
+        return None, (json_response({'error': 'Keyword cannot be empty'}), 400)
+    
+    if len(user_keyword) > MAX_KEYWORD_LENGTH:
+        return None, (json_response({'error': f'Keyword must be at most {MAX_KEYWORD_LENGTH} characters'}), 400)
+    
+    return user_keyword, None
+
+def normalize_keyword(keyword):
+    """Lowercase and collapse whitespace; the embedding model is uncased, so matches are unchanged"""
+    return ' '.join(keyword.lower().split())
+
+def match_keyword(user_keyword):
+    """Find the nearest category and keyword trend data, returning (result, error_response)"""
+    match, error = find_keyword_match(normalize_keyword(user_keyword))
+    if error:
+        return None, (json_response(error), 404)
+    
+    # Copy, since the memoized match is shared between requests
+    return {'user_keyword': user_keyword, **match}, None
+
+@functools.lru_cache(maxsize=2048)
+def find_keyword_match(normalized_keyword):
+    """Match a normalized keyword to its nearest category and tracked keyword, returning (match, error)"""
+    # Step 1: Find the nearest category using embeddings
+    user_embedding = encode_texts([normalized_keyword])[0]
+    
+    # Calculate cosine similarity with all categories (embeddings are pre-normalized)
+    similarities = category_embeddings @ user_embedding
+    best_category_idx = np.argmax(similarities)
+    best_category = categories_list[best_category_idx]
+    category_similarity = float(similarities[best_category_idx])
+    
+    print(f"Best matching category for '{normalized_keyword}': {best_category} (similarity: {category_similarity:.3f})")
+    
+    # Step 2: Look up the keyword trend phases loaded at startup for the category
+    keyword_columns = keyword_data_by_category.get(best_category)
+    
+    if keyword_columns is None:
+        return None, {
+            'error': f'Data file not found for category: {best_category}',
+            'category': best_category,
+            'category_similarity': category_similarity
+        }
+    
+    keyword_index = keyword_indexes_by_category.get(best_category)
+    
+    if not len(keyword_columns['keyword']) or keyword_index is None:
+        return None, {
+            'error': f'No keyword data found for category: {best_category}',
+            'category': best_category,
+            'category_similarity': category_similarity
+        }
+    
+    # Step 3: Find the closest keyword using the precomputed keyword embeddings
+    # (inner product equals cosine similarity since all embeddings are normalized)
+    best_keyword_idx, keyword_similarity = search_keyword_index(keyword_index, user_embedding)
+    best_keyword_match = keyword_columns['keyword'][best_keyword_idx]
+    
+    # Extract the trend data for the best matching keyword
+    phase = keyword_columns['phase'][best_keyword_idx]
+    velocity = float(keyword_columns['velocity'][best_keyword_idx])
+    engagement_rate = float(keyword_columns['engagement_rate'][best_keyword_idx])
+    
+    match = {
+        'matched_category': best_category,
+        'category_similarity': round(category_similarity, 3),
+        'matched_keyword': best_keyword_match,
+        'keyword_similarity': round(keyword_similarity, 3),
+        'phase': phase,
+        'velocity': velocity,
+        'engagement_rate': engagement_rate,
+        'velocity_description': f"{velocity:.1f} mentions per month (past 3 months)",
+        'engagement_description': f"Popularity score: {engagement_rate:.3f}",
+        'phase_description': get_phase_description(phase)
+    }
+    
+    return match, None
 
 @app.route('/api/keyword-checker', methods=['POST'])
 def keyword_checker():
     """Check keyword and find matching category and trend data"""
     try:
-        data = request.get_json()
-        if not data or 'keyword' not in data:
-            return jsonify({'error': 'Keyword is required'}), 400
-            
-        user_keyword = data['keyword'].strip()
-        if not user_keyword:
-            return jsonify({'error': 'Keyword cannot be empty'}), 400
-        
-        # Step 1: Find the nearest category using embeddings
-        user_embedding = model.encode([user_keyword])
-        
-        # Calculate cosine similarity with all categories
-        similarities = cosine_similarity(user_embedding, category_embeddings)[0]
-        best_category_idx = np.argmax(similarities)
-        best_category = categories_list[best_category_idx]
-        category_similarity = float(similarities[best_category_idx])
-        
-        print(f"Best matching category for '{user_keyword}': {best_category} (similarity: {category_similarity:.3f})")
-        
-        # Step 2: Load the corresponding keyword trend phases CSV
-        csv_filename = f"third_layer_data/{best_category}_keyword_trend_phases.csv"
-        
-        if not os.path.exists(csv_filename):
-            return jsonify({
-                'error': f'Data file not found for category: {best_category}',
-                'category': best_category,
-                'category_similarity': category_similarity
-            }), 404
-        
-        # Load keyword data for the matched category
-        keyword_df = pd.read_csv(csv_filename)
-        
-        if keyword_df.empty:
-            return jsonify({
-                'error': f'No keyword data found for category: {best_category}',
-                'category': best_category,
-                'category_similarity': category_similarity
-            }), 404
-        
-        # Step 3: Find the closest keyword using embeddings
-        category_keywords = keyword_df['keyword'].tolist()
-        category_keyword_embeddings = model.encode(category_keywords)
-        
-        # Calculate cosine similarity with all keywords in the category
-        keyword_similarities = cosine_similarity(user_embedding, category_keyword_embeddings)[0]
-        best_keyword_idx = np.argmax(keyword_similarities)
-        best_keyword_match = category_keywords[best_keyword_idx]
-        keyword_similarity = float(keyword_similarities[best_keyword_idx])
-        
-        # Extract the trend data for the best matching keyword
-        keyword_data = keyword_df.iloc[best_keyword_idx]
+        user_keyword, error_response = get_request_keyword()
+        if error_response:
+            return error_response
+        
+        result, error_response = match_keyword(user_keyword)
+        if error_response:
+            return error_response
         
         # Get LLM analysis for future trends
         print(f"Getting LLM analysis for keyword: {user_keyword}")
         llm_analysis = analyze_keyword_with_llm(
             keyword=user_keyword,
-            category=best_category,
-            phase=keyword_data['phase'],
-            velocity=float(keyword_data['velocity']),
-            engagement_rate=float(keyword_data['engagement_rate']),
-            matched_keyword=best_keyword_match
+            category=result['matched_category'],
+            phase=result['phase'],
+            velocity=result['velocity'],
+            engagement_rate=result['engagement_rate'],
+            matched_keyword=result['matched_keyword']
         )
-
-        result = {
-            'user_keyword': user_keyword,
-            'matched_category': best_category,
-            'category_similarity': round(category_similarity, 3),
-            'matched_keyword': best_keyword_match,
-            'keyword_similarity': round(keyword_similarity, 3),
-            'phase': keyword_data['phase'],
-            'velocity': float(keyword_data['velocity']),
-            'engagement_rate': float(keyword_data['engagement_rate']),
-            'velocity_description': f"{keyword_data['velocity']:.1f} mentions per month (past 3 months)",
-            'engagement_description': f"Popularity score: {keyword_data['engagement_rate']:.3f}",
-            'phase_description': get_phase_description(keyword_data['phase']),
-            # Add LLM analysis
-            'future_trend': llm_analysis['future_trend'],
-            'insights': llm_analysis['insights'],
-            'recommendations': llm_analysis['recommendations']
-        }
+        
+        # Add LLM analysis
+        result['future_trend'] = llm_analysis['future_trend']
+        result['insights'] = llm_analysis['insights']
+        result['recommendations'] = llm_analysis['recommendations']
         
         print(f"Keyword checker result: {result}")
-        return jsonify(result)
+        return json_response(result)
         
     except Exception as e:
         print(f"Error in keyword checker: {e}")
-        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+        return json_response({'error': f'Internal server error: {str(e)}'}), 500
+
+def sse_event(event, payload):
+    """Format a payload as a Server-Sent Event"""
+    return f"event: {event}\ndata: {to_json_bytes(payload).decode('utf-8')}\n\n"
+
+@app.route('/api/keyword-checker/stream', methods=['POST'])
+def keyword_checker_stream():
+    """Stream keyword match data immediately, then the LLM analysis as it is generated"""
+    try:
+        user_keyword, error_response = get_request_keyword()
+        if error_response:
+            return error_response
+        
+        result, error_response = match_keyword(user_keyword)
+        if error_response:
+            return error_response
+        
+        return Response(
+            stream_with_context(stream_keyword_analysis(result)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        
+    except Exception as e:
+        print(f"Error in keyword checker stream: {e}")
+        return json_response({'error': f'Internal server error: {str(e)}'}), 500
+
+def stream_keyword_analysis(result):
+    """Yield the match result, the future trend as soon as it is parsed, then the full analysis"""
+    yield sse_event('match', result)
+    
+    if not llm:
+        yield sse_event('analysis', LLM_UNAVAILABLE_ANALYSIS)
+        return
+    
+    cache_key = llm_cache_key(
+        result['matched_category'],
+        result['matched_keyword'],
+        result['phase'],
+        result['velocity'],
+        result['engagement_rate']
+    )
+    cached_analysis = get_cached_analysis(cache_key)
+    if cached_analysis is not None:
+        yield sse_event('analysis', cached_analysis)
+        return
+    
+    try:
+        prompt = build_llm_prompt(
+            keyword=result['user_keyword'],
+            category=result['matched_category'],
+            phase=result['phase'],
+            velocity=result['velocity'],
+            engagement_rate=result['engagement_rate'],
+            matched_keyword=result['matched_keyword']
+        )
+        
+        state = new_llm_parse_state()
+        response_text = ""
+        pending_line = ""
+        future_trend_sent = False
+        
+        for chunk in llm.stream(prompt):
+            text = chunk.content.translate(STRIP_ASTERISKS)
+            response_text += text
+            
+            # Only parse complete lines; keep the trailing partial line for the next chunk
+            *lines, pending_line = (pending_line + text).split('\n')
+            for line in lines:
+                parse_llm_line(state, line)
+            
+            if state['future_trend'] and not future_trend_sent:
+                yield sse_event('future_trend', {'future_trend': state['future_trend']})
+                future_trend_sent = True
+        
+        parse_llm_line(state, pending_line)
+        analysis = finalize_llm_analysis(state, response_text)
+        store_cached_analysis(cache_key, analysis)
+        
+    except Exception as e:
+        print(f"Error in streamed LLM analysis: {e}")
+        analysis = LLM_ERROR_ANALYSIS
+    
+    yield sse_event('analysis', analysis)
+
+LLM_UNAVAILABLE_ANALYSIS = {
+    "future_trend": "AI analysis temporarily unavailable",
+    "insights": ["Manual trend analysis required", "Data shows current engagement patterns"],
+    "recommendations": ["Monitor velocity changes", "Track engagement trends"]
+}
+
+LLM_ERROR_ANALYSIS = {
+    "future_trend": "Trend analysis indicates potential market evolution based on current metrics",
+    "insights": [
+        "Current engagement levels suggest active audience interest",
+        "Velocity patterns indicate momentum changes in market attention",
+        "Category positioning shows competitive landscape dynamics"
+    ],
+    "recommendations": [
+        "Monitor weekly mention patterns for early trend detection",
+        "Track competitor engagement strategies in this category",
+        "Adjust content strategy based on audience engagement feedback"
+    ]
+}
+
+def build_llm_prompt(keyword, category, phase, velocity, engagement_rate, matched_keyword):
+    """Create a comprehensive prompt for trend analysis with metrics explanation"""
+    return f"""
+    You are a beauty industry trend analyst for L'Oréal. Analyze the following keyword data and provide clear, actionable insights.
+
+    KEYWORD DATA:
+    - User Input: "{keyword}"
+    - Best Category Match: "{category.replace('_', ' ')}"
+    - Similar Keyword: "{matched_keyword}"
+    - Trend Phase: {phase}
+    - Velocity: {velocity:.1f} mentions/month (3-month trend)
+    - Engagement Rate: {engagement_rate:.4f}
+
+    METRICS EXPLAINED:
+    - Velocity: Slope of mentions over last 3 months (positive = increasing, negative = decreasing)
+    - Engagement Rate: Average user interaction score (likes + comments + shares) / views
+    - Phase Classification:
+      * Emerging: Rising mentions, low engagement
+      * Growing: Rising mentions, high engagement  
+      * Peaking: Slowing mentions, high engagement
+      * Decaying: Slowing mentions, low engagement
+
+    RESPONSE FORMAT:
+    Provide exactly 3 sections with clean, professional language:
+
+    FUTURE TREND:
+    [One clear sentence about expected trend direction for next 3-6 months based on the metrics]
+
+    KEY INSIGHTS:
+    - [Business insight 1]
+    - [Business insight 2]
+    - [Business insight 3]
+
+    RECOMMENDATIONS:
+    - [Actionable recommendation 1]
+    - [Actionable recommendation 2]
+    - [Actionable recommendation 3]
+
+    Keep language professional, avoid asterisks, and focus on practical business value for beauty brands.
+    """
+
+def llm_cache_key(category, matched_keyword, phase, velocity, engagement_rate):
+    """Key LLM analyses by matched keyword and bucketed metrics, so similar user inputs share one"""
+    return (category, matched_keyword, phase, round(velocity, 1), round(engagement_rate, 3))
+
+def get_cached_analysis(key):
+    """Look up a cached LLM analysis, treating cache errors as misses"""
+    if llm_cache is None:
+        return None
+    try:
+        return llm_cache.get(key)
+    except Exception as e:
+        print(f"Error reading LLM cache: {e}")
+        return None
+
+def store_cached_analysis(key, analysis):
+    """Store an LLM analysis in the cache"""
+    if llm_cache is None:
+        return
+    try:
+        llm_cache.set(key, analysis)
+    except Exception as e:
+        print(f"Error writing LLM cache: {e}")
 
 def analyze_keyword_with_llm(keyword, category, phase, velocity, engagement_rate, matched_keyword):
     """Use Gemini to analyze keyword trends and provide insights"""
     if not llm:
-        return {
-            "future_trend": "AI analysis temporarily unavailable",
-            "insights": ["Manual trend analysis required", "Data shows current engagement patterns"],
-            "recommendations": ["Monitor velocity changes", "Track engagement trends"]
-        }
+        return LLM_UNAVAILABLE_ANALYSIS
+    
+    cache_key = llm_cache_key(category, matched_keyword, phase, velocity, engagement_rate)
+    cached_analysis = get_cached_analysis(cache_key)
+    if cached_analysis is not None:
+        return cached_analysis
     
     try:
-        # Create a comprehensive prompt for trend analysis with metrics explanation
-        prompt = f"""
-        You are a beauty industry trend analyst for L'Oréal. Analyze the following keyword data and provide clear, actionable insights.
-
-        KEYWORD DATA:
-        - User Input: "{keyword}"
-        - Best Category Match: "{category.replace('_', ' ')}"
-        - Similar Keyword: "{matched_keyword}"
-        - Trend Phase: {phase}
-        - Velocity: {velocity:.1f} mentions/month (3-month trend)
-        - Engagement Rate: {engagement_rate:.4f}
-
-        METRICS EXPLAINED:
-        - Velocity: Slope of mentions over last 3 months (positive = increasing, negative = decreasing)
-        - Engagement Rate: Average user interaction score (likes + comments + shares) / views
-        - Phase Classification:
-          * Emerging: Rising mentions, low engagement
-          * Growing: Rising mentions, high engagement  
-          * Peaking: Slowing mentions, high engagement
-          * Decaying: Slowing mentions, low engagement
-
-        RESPONSE FORMAT:
-        Provide exactly 3 sections with clean, professional language:
-
-        FUTURE TREND:
-        [One clear sentence about expected trend direction for next 3-6 months based on the metrics]
-
-        KEY INSIGHTS:
-        - [Business insight 1]
-        - [Business insight 2]
-        - [Business insight 3]
-
-        RECOMMENDATIONS:
-        - [Actionable recommendation 1]
-        - [Actionable recommendation 2]
-        - [Actionable recommendation 3]
-
-        Keep language professional, avoid asterisks, and focus on practical business value for beauty brands.
-        """
+        prompt = build_llm_prompt(keyword, category, phase, velocity, engagement_rate, matched_keyword)
         
         # Get response from Gemini
         response = llm.invoke(prompt)
@@ -544,108 +1005,110 @@ def analyze_keyword_with_llm(keyword, category, phase, velocity, engagement_rate
         
         # Parse the response into structured format
         parsed_analysis = parse_llm_response_enhanced(analysis_text)
+        store_cached_analysis(cache_key, parsed_analysis)
         
         return parsed_analysis
         
     except Exception as e:
         print(f"Error in LLM analysis: {e}")
-        return {
-            "future_trend": "Trend analysis indicates potential market evolution based on current metrics",
-            "insights": [
-                "Current engagement levels suggest active audience interest",
-                "Velocity patterns indicate momentum changes in market attention",
-                "Category positioning shows competitive landscape dynamics"
-            ],
-            "recommendations": [
-                "Monitor weekly mention patterns for early trend detection",
-                "Track competitor engagement strategies in this category",
-                "Adjust content strategy based on audience engagement feedback"
-            ]
-        }
+        return LLM_ERROR_ANALYSIS
+
+# Section headers of the LLM response, optionally preceded by markdown heading or numbering
+SECTION_HEADER_RE = re.compile(
+    r'^[#\d.)\s]*(?:(?P<trend>future trend)|(?P<insights>key insight|insights:)|(?P<recommendations>recommend))',
+    re.IGNORECASE
+)
+BULLET_RE = re.compile(r'^[-•]\s*(.*)$')
+SECTION_WORD_RE = re.compile(r'insight|recommendation', re.IGNORECASE)
+STRIP_ASTERISKS = str.maketrans('', '', '*')
+
+def new_llm_parse_state():
+    """Create an empty parser state for an LLM response"""
+    return {'section': None, 'future_trend': "", 'insights': [], 'recommendations': []}
+
+def parse_llm_line(state, line):
+    """Feed one line of an (asterisk-free) LLM response into the parser state"""
+    line = line.strip()
+    if not line:
+        return
+    
+    # Identify sections
+    header = SECTION_HEADER_RE.match(line)
+    if header:
+        state['section'] = header.lastgroup
+        return
+    
+    bullet = BULLET_RE.match(line)
+    
+    # Extract content based on current section
+    if state['section'] == "trend":
+        if not state['future_trend'] and len(line) > 15 and not bullet:  # Avoid bullet points
+            state['future_trend'] = line
+    
+    elif state['section'] in ("insights", "recommendations"):
+        items = state[state['section']]
+        if bullet:
+            clean_item = bullet.group(1).strip()
+            if len(clean_item) > 10:
+                items.append(clean_item)
+        elif len(line) > 15 and len(items) < 3 and not SECTION_WORD_RE.search(line):
+            items.append(line)
+
+def finalize_llm_analysis(state, response_text):
+    """Turn the parser state into the analysis result, filling in fallback content"""
+    future_trend = state['future_trend']
+    insights = list(state['insights'])
+    recommendations = list(state['recommendations'])
+    
+    # Ensure we have quality content
+    if not future_trend or "based on current metrics, expect continued trend evolution" in future_trend.lower():
+        response_lower = response_text.lower()
+        if "peaking" in response_lower:
+            future_trend = "This keyword is approaching market saturation and may see declining momentum in the coming months"
+        elif "growing" in response_lower:
+            future_trend = "Strong upward trajectory suggests continued growth and increased market interest over the next quarter"
+        elif "emerging" in response_lower:
+            future_trend = "Early-stage trend with potential for significant growth as market awareness increases"
+        elif "decaying" in response_lower:
+            future_trend = "Downward trend indicates declining market interest and reduced content engagement"
+        else:
+            future_trend = "Market dynamics suggest evolving consumer interest patterns requiring strategic monitoring"
+    
+    # Ensure minimum quality insights
+    if len(insights) < 2:
+        default_insights = [
+            "Current engagement metrics indicate measurable audience interaction levels",
+            "Velocity patterns reveal important momentum shifts in market attention",
+            "Category positioning demonstrates competitive landscape opportunities"
+        ]
+        insights.extend(default_insights[:3-len(insights)])
+    
+    # Ensure minimum quality recommendations  
+    if len(recommendations) < 2:
+        default_recommendations = [
+            "Implement weekly monitoring of mention patterns and engagement rates",
+            "Develop targeted content strategies aligned with current trend phase",
+            "Analyze competitor activities within this keyword category"
+        ]
+        recommendations.extend(default_recommendations[:3-len(recommendations)])
+        
+    return {
+        "future_trend": future_trend.strip(),
+        "insights": insights[:3],  # Limit to 3 items
+        "recommendations": recommendations[:3]  # Limit to 3 items
+    }
 
 def parse_llm_response_enhanced(response_text):
     """Parse LLM response into structured format with improved cleaning"""
     try:
         # Clean the response text
-        response_text = response_text.replace('**', '').replace('*', '')
-        lines = [line.strip() for line in response_text.split('\n') if line.strip()]
+        response_text = response_text.translate(STRIP_ASTERISKS)
         
-        future_trend = ""
-        insights = []
-        recommendations = []
-        current_section = None
+        state = new_llm_parse_state()
+        for line in response_text.split('\n'):
+            parse_llm_line(state, line)
         
-        for line in lines:
-            line_lower = line.lower()
-            
-            # Identify sections
-            if "future trend" in line_lower:
-                current_section = "trend"
-                continue
-            elif "key insight" in line_lower or "insights:" in line_lower:
-                current_section = "insights"
-                continue
-            elif "recommend" in line_lower:
-                current_section = "recommendations"
-                continue
-                
-            # Extract content based on current section
-            if current_section == "trend" and not future_trend:
-                if len(line) > 15 and not line.startswith('-'):  # Avoid bullet points
-                    future_trend = line.strip()
-                    
-            elif current_section == "insights":
-                if line.startswith('-'):
-                    clean_insight = line[1:].strip()
-                    if clean_insight and len(clean_insight) > 10:
-                        insights.append(clean_insight)
-                elif len(line) > 15 and len(insights) < 3 and not any(keyword in line_lower for keyword in ['insight', 'recommendation']):
-                    insights.append(line.strip())
-                    
-            elif current_section == "recommendations":
-                if line.startswith('-'):
-                    clean_rec = line[1:].strip()
-                    if clean_rec and len(clean_rec) > 10:
-                        recommendations.append(clean_rec)
-                elif len(line) > 15 and len(recommendations) < 3 and not any(keyword in line_lower for keyword in ['insight', 'recommendation']):
-                    recommendations.append(line.strip())
-        
-        # Ensure we have quality content
-        if not future_trend or "based on current metrics, expect continued trend evolution" in future_trend.lower():
-            if "peaking" in str(response_text).lower():
-                future_trend = "This keyword is approaching market saturation and may see declining momentum in the coming months"
-            elif "growing" in str(response_text).lower():
-                future_trend = "Strong upward trajectory suggests continued growth and increased market interest over the next quarter"
-            elif "emerging" in str(response_text).lower():
-                future_trend = "Early-stage trend with potential for significant growth as market awareness increases"
-            elif "decaying" in str(response_text).lower():
-                future_trend = "Downward trend indicates declining market interest and reduced content engagement"
-            else:
-                future_trend = "Market dynamics suggest evolving consumer interest patterns requiring strategic monitoring"
-        
-        # Ensure minimum quality insights
-        if len(insights) < 2:
-            default_insights = [
-                "Current engagement metrics indicate measurable audience interaction levels",
-                "Velocity patterns reveal important momentum shifts in market attention",
-                "Category positioning demonstrates competitive landscape opportunities"
-            ]
-            insights.extend(default_insights[:3-len(insights)])
-        
-        # Ensure minimum quality recommendations  
-        if len(recommendations) < 2:
-            default_recommendations = [
-                "Implement weekly monitoring of mention patterns and engagement rates",
-                "Develop targeted content strategies aligned with current trend phase",
-                "Analyze competitor activities within this keyword category"
-            ]
-            recommendations.extend(default_recommendations[:3-len(recommendations)])
-            
-        return {
-            "future_trend": future_trend.strip(),
-            "insights": insights[:3],  # Limit to 3 items
-            "recommendations": recommendations[:3]  # Limit to 3 items
-        }
+        return finalize_llm_analysis(state, response_text)
         
     except Exception as e:
         print(f"Error parsing enhanced LLM response: {e}")
@@ -675,4 +1138,5 @@ def get_phase_description(phase):
     return descriptions.get(phase, f'This keyword is in the {phase} phase.')
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    # Development server only; production runs through gunicorn_conf.py
+    app.run(debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true', port=int(os.getenv('PORT', 5000)))
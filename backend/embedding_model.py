@@ -0,0 +1,128 @@
+"""Embedding model loading shared by api.py and embedding_service.py.
+
+Import this before numpy: it sizes the BLAS / OpenMP thread pools from EMBEDDING_THREADS.
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Under gunicorn, gunicorn_conf.py sets EMBEDDING_THREADS to the cores per worker.
+# Otherwise default to the cores this process may run on, not the host's core count.
+if hasattr(os, 'sched_getaffinity'):
+    EMBEDDING_THREADS = int(os.getenv('EMBEDDING_THREADS', len(os.sched_getaffinity(0))))
+else:
+    EMBEDDING_THREADS = int(os.getenv('EMBEDDING_THREADS', os.cpu_count() or 1))
+for thread_var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+    os.environ.setdefault(thread_var, str(EMBEDDING_THREADS))
+
+import httpx
+import numpy as np
+import orjson
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+# export_onnx_model.py writes the quantized model here; the file name follows the config
+ONNX_MODEL_DIR = 'onnx_model'
+ONNX_QUANTIZATION_CONFIG = 'avx512_vnni'
+ONNX_MODEL_FILE = f'onnx/model_qint8_{ONNX_QUANTIZATION_CONFIG}.onnx'
+
+# Set EMBEDDING_SERVICE_SOCKET (unix socket) or EMBEDDING_SERVICE_URL to encode
+# through a running embedding_service.py instead of loading the model per process
+EMBEDDING_SERVICE_URL = os.getenv('EMBEDDING_SERVICE_URL')
+EMBEDDING_SERVICE_SOCKET = os.getenv('EMBEDDING_SERVICE_SOCKET')
+# Bulk encodes (cache builds at startup) may take a while; a single query must fail
+# well within gunicorn's 120 s worker timeout
+EMBEDDING_SERVICE_TIMEOUT = 120
+EMBEDDING_SERVICE_QUERY_TIMEOUT = 10
+EMBEDDING_SERVICE_QUERY_MAX_TEXTS = 32
+
+def load_local_embedding_model():
+    """Load the INT8 quantized ONNX model, falling back to the PyTorch model"""
+    # Imported here so processes encoding through the embedding service never load torch
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # Inter-op parallelism only helps multi-branch graphs; a single encoder forward pass
+    # runs on the intra-op pool. This can only be set once, before any parallel work.
+    if torch.get_num_interop_threads() != 1:
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError as e:
+            print(f"Could not set torch inter-op threads: {e}")
+
+    if os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+        try:
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = EMBEDDING_THREADS
+            session_options.inter_op_num_threads = 1
+
+            onnx_model = SentenceTransformer(
+                ONNX_MODEL_DIR,
+                backend='onnx',
+                model_kwargs={'file_name': ONNX_MODEL_FILE, 'session_options': session_options}
+            )
+            return onnx_model, f"{EMBEDDING_MODEL_NAME}:{ONNX_MODEL_FILE}"
+        except Exception as e:
+            print(f"Failed to load quantized ONNX model: {e}")
+    else:
+        print("Quantized ONNX model not found (run export_onnx_model.py), using PyTorch backend")
+
+    torch.set_num_threads(EMBEDDING_THREADS)
+    return SentenceTransformer(EMBEDDING_MODEL_NAME), EMBEDDING_MODEL_NAME
+
+class RemoteEmbeddingModel:
+    """Client for embedding_service.py with the subset of SentenceTransformer.encode that api.py uses"""
+
+    def __init__(self, base_url=None, socket_path=None):
+        transport = httpx.HTTPTransport(uds=socket_path) if socket_path else None
+        self.client = httpx.Client(
+            base_url=base_url or 'http://embedding-service',
+            transport=transport,
+            timeout=EMBEDDING_SERVICE_TIMEOUT
+        )
+
+    def model_id(self):
+        """Identifier of the model the service is running"""
+        response = self.client.get('/info')
+        response.raise_for_status()
+        return response.json()['model_id']
+
+    def encode(self, texts, **kwargs):
+        """Encode texts remotely; the service always returns L2-normalized float32 embeddings"""
+        texts = list(texts)
+        body = orjson.dumps({'texts': texts})
+        timeout = EMBEDDING_SERVICE_QUERY_TIMEOUT if len(texts) <= EMBEDDING_SERVICE_QUERY_MAX_TEXTS else EMBEDDING_SERVICE_TIMEOUT
+        for attempt in range(2):
+            try:
+                response = self.client.post('/encode', content=body, headers={'Content-Type': 'application/json'}, timeout=timeout)
+                break
+            except (httpx.ConnectError, httpx.RemoteProtocolError, httpx.ReadError) as e:
+                # Pooled unix-socket connections occasionally go stale (surfacing as a read error
+                # on reuse); encoding is idempotent, so retry once. Timeouts are not retried.
+                if attempt:
+                    raise
+                print(f"Embedding service connection failed, retrying: {e}")
+        response.raise_for_status()
+        dimension = int(response.headers['X-Embedding-Dim'])
+        return np.frombuffer(response.content, dtype=np.float32).reshape(len(texts), dimension)
+
+def load_embedding_model(expected_model_id=None):
+    """Connect to the embedding service when configured, otherwise load the model in-process.
+
+    With expected_model_id, only a model matching the cached embeddings is accepted.
+    """
+    if EMBEDDING_SERVICE_SOCKET or EMBEDDING_SERVICE_URL:
+        try:
+            remote_model = RemoteEmbeddingModel(EMBEDDING_SERVICE_URL, EMBEDDING_SERVICE_SOCKET)
+            remote_model_id = remote_model.model_id()
+            if expected_model_id is None or remote_model_id == expected_model_id:
+                return remote_model, remote_model_id
+            print(f"Embedding service runs {remote_model_id}, expected {expected_model_id}; loading the model in-process")
+        except Exception as e:
+            print(f"Embedding service unavailable, loading the model in-process: {e}")
+
+    local_model, local_model_id = load_local_embedding_model()
+    if expected_model_id is not None and local_model_id != expected_model_id:
+        raise RuntimeError(f"Embedding model {local_model_id} does not match the cached embeddings ({expected_model_id})")
+    return local_model, local_model_id
@@ -0,0 +1,138 @@
+"""Shared embedding inference service for the API workers.
+
+Holds the only copy of the embedding model and micro-batches concurrent encode
+requests, so a forward pass serves many web requests at near single-request latency.
+
+Usage: uvicorn embedding_service:app --uds /tmp/embedding.sock
+Then start the API with EMBEDDING_SERVICE_SOCKET=/tmp/embedding.sock.
+"""
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+from embedding_model import load_local_embedding_model
+
+import numpy as np
+import orjson
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Wait up to BATCH_WINDOW_MS after the first queued request for more to arrive
+BATCH_WINDOW_MS = float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', 10))
+MAX_BATCH_TEXTS = int(os.getenv('EMBEDDING_MAX_BATCH', 32))
+
+print("Loading SentenceTransformer model...")
+model, embedding_model_id = load_local_embedding_model()
+embedding_dim = model.get_sentence_embedding_dimension()
+print(f"Model loaded successfully! ({embedding_model_id})")
+
+def encode_batch(texts):
+    """Encode one micro-batch into L2-normalized float32 embeddings"""
+    return model.encode(texts, batch_size=MAX_BATCH_TEXTS, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+def fail_requests(requests, error):
+    """Resolve the futures of (texts, future) requests that are still waiting with an error"""
+    for _, future in requests:
+        if not future.done():
+            future.set_exception(error)
+
+async def collect_batch(request_queue, pending):
+    """Wait for a request, then gather more into pending until the batch window closes or the batch is full"""
+    loop = asyncio.get_running_loop()
+    pending.append(await request_queue.get())
+    batch_texts = len(pending[0][0])
+    deadline = loop.time() + BATCH_WINDOW_MS / 1000
+
+    while batch_texts < MAX_BATCH_TEXTS:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            item = await asyncio.wait_for(request_queue.get(), remaining)
+        except asyncio.TimeoutError:
+            break
+        pending.append(item)
+        batch_texts += len(item[0])
+
+async def run_batches(request_queue):
+    """Encode queued requests one micro-batch at a time and resolve their futures"""
+    loop = asyncio.get_running_loop()
+    pending = []
+    try:
+        while True:
+            pending = []
+            await collect_batch(request_queue, pending)
+            texts = [text for item_texts, _ in pending for text in item_texts]
+
+            try:
+                # encode() releases the GIL, so the event loop keeps accepting requests meanwhile
+                embeddings = await loop.run_in_executor(None, encode_batch, texts)
+            except Exception as e:
+                print(f"Error encoding batch of {len(texts)} texts: {e}")
+                fail_requests(pending, e)
+                continue
+
+            offset = 0
+            for item_texts, future in pending:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+    except asyncio.CancelledError:
+        # Shutting down: the batch being gathered or encoded will never complete
+        fail_requests(pending, RuntimeError('Embedding service is shutting down'))
+        raise
+
+async def encode(request):
+    """Encode {"texts": [...]} and return the embeddings as raw float32 rows"""
+    try:
+        texts = orjson.loads(await request.body())['texts']
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        return JSONResponse({'error': 'Expected a JSON body with a "texts" list'}, status_code=400)
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return JSONResponse({'error': '"texts" must be a list of strings'}, status_code=400)
+
+    if texts:
+        future = asyncio.get_running_loop().create_future()
+        await request.app.state.request_queue.put((texts, future))
+        try:
+            embeddings = await future
+        except Exception as e:
+            return JSONResponse({'error': str(e)}, status_code=500)
+    else:
+        embeddings = np.empty((0, embedding_dim), dtype=np.float32)
+
+    return Response(
+        embeddings.tobytes(),
+        media_type='application/octet-stream',
+        headers={'X-Embedding-Dim': str(embedding_dim)}
+    )
+
+async def info(request):
+    """Model identifier, used by the API to key its embedding caches"""
+    return JSONResponse({'model_id': embedding_model_id, 'dimension': embedding_dim})
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.request_queue = asyncio.Queue()
+    batch_task = asyncio.create_task(run_batches(app.state.request_queue))
+    yield
+    batch_task.cancel()
+    try:
+        await batch_task
+    except asyncio.CancelledError:
+        pass
+
+    # Fail requests still queued so their handlers return instead of waiting forever
+    queued = []
+    while not app.state.request_queue.empty():
+        queued.append(app.state.request_queue.get_nowait())
+    fail_requests(queued, RuntimeError('Embedding service is shutting down'))
+
+app = Starlette(
+    routes=[
+        Route('/encode', encode, methods=['POST']),
+        Route('/info', info, methods=['GET']),
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,16 @@
+"""Export the keyword embedding model to ONNX with INT8 dynamic quantization.
+
+Run once at build time; embedding_model.py picks up the quantized model from ONNX_MODEL_DIR.
+"""
+from embedding_model import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR, ONNX_QUANTIZATION_CONFIG
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+if __name__ == '__main__':
+    print(f"Exporting {EMBEDDING_MODEL_NAME} to ONNX...")
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME, backend='onnx')
+    model.save(ONNX_MODEL_DIR)
+    
+    print(f"Quantizing ONNX model ({ONNX_QUANTIZATION_CONFIG})...")
+    export_dynamic_quantized_onnx_model(model, ONNX_QUANTIZATION_CONFIG, ONNX_MODEL_DIR)
+    print(f"Quantized model saved to {ONNX_MODEL_DIR}/")
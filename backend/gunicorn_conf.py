@@ -0,0 +1,46 @@
+"""Gunicorn settings for serving api.py in production.
+
+Usage: gunicorn -c gunicorn_conf.py api:app
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Sync-style threaded workers: read endpoints scale with workers, and model.encode
+# calls release the GIL so threads within a worker overlap. Every worker loads its
+# own embedding model, so keep the default small; os.cpu_count() inside a container
+# reports the host's cores. Raise WEB_CONCURRENCY on larger instances.
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Split the cores this process may run on between workers so their inference thread
+# pools do not oversubscribe the CPU (read by embedding_model.py before torch is imported).
+# CPU quotas are invisible here, so quota-limited hosts should set EMBEDDING_THREADS.
+available_cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+os.environ.setdefault('EMBEDDING_THREADS', str(max(1, available_cpus // workers)))
+timeout = 120
+
+# Load the data and embedding caches once in the master so workers share them
+# copy-on-write (the embedding model itself is reloaded per worker in post_fork)
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+def when_ready(server):
+    # The master only needs the model to build the embedding caches during
+    # preload; workers load their own in post_fork, so release it before forking
+    import gc
+    import api
+    api.model = None
+    gc.collect()
+
+def post_fork(server, worker):
+    # ONNX Runtime / OpenMP thread pools, embedding service connections and SQLite
+    # connections do not survive fork(), so each worker gets a fresh embedding model
+    # (or service client) and LLM cache handle while the preloaded data stays shared.
+    # The worker must encode queries with the same model the master cached embeddings with.
+    import api
+    api.model, _ = api.load_embedding_model(api.embedding_model_id)
+    api.llm_cache = api.open_llm_cache()
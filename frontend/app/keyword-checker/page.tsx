@@ -1,6 +1,6 @@
 "use client"
 
-import { useState } from "react"
+import { useEffect, useRef, useState } from "react"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card"
 import { Button } from "@/components/ui/button"
 import { Input } from "@/components/ui/input"
@@ -15,22 +15,47 @@ export default function KeywordCheckerPage() {
   const [result, setResult] = useState<KeywordCheckerResponse | null>(null)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
+  const streamController = useRef<AbortController | null>(null)
+
+  // Stop any in-flight analysis stream when leaving the page
+  useEffect(() => () => streamController.current?.abort(), [])
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     if (!keyword.trim()) return
 
+    // A previous stream must not merge its analysis into this keyword's result
+    streamController.current?.abort()
+    const controller = new AbortController()
+    streamController.current = controller
+
     setLoading(true)
     setError(null)
     setResult(null)
 
     try {
-      const response = await apiService.checkKeyword(keyword.trim())
-      setResult(response)
+      // Show the match as soon as it arrives; the AI analysis fills in while it streams.
+      // The form stays disabled until the stream finishes.
+      await apiService.checkKeywordStream(keyword.trim(), {
+        onMatch: (match) =>
+          setResult({ ...match, future_trend: "", insights: [], recommendations: [] }),
+        onFutureTrend: (futureTrend) =>
+          setResult((prev) => (prev ? { ...prev, future_trend: futureTrend } : prev)),
+        onAnalysis: (analysis) =>
+          setResult((prev) => (prev ? { ...prev, ...analysis } : prev)),
+      }, controller.signal)
     } catch (err) {
+      if (controller.signal.aborted) return
       setError(err instanceof Error ? err.message : "An error occurred while checking the keyword")
+      // Replace the "Generating AI analysis..." placeholder if the match already arrived
+      setResult((prev) =>
+        prev && !prev.future_trend ? { ...prev, future_trend: "AI analysis temporarily unavailable" } : prev
+      )
     } finally {
-      setLoading(false)
+      if (streamController.current === controller) {
+        streamController.current = null
+        setLoading(false)
+      }
     }
   }
 
@@ -278,7 +303,7 @@ export default function KeywordCheckerPage() {
                     </div>
                     <div className="p-4 bg-background/50 rounded-lg border">
                       <p className="text-sm text-foreground leading-relaxed">
-                        {result.future_trend}
+                        {result.future_trend || "Generating AI analysis..."}
                       </p>
                     </div>
                   </div>
@@ -91,6 +91,16 @@ export interface KeywordCheckerResponse {
   recommendations: string[];
 }
 
+export type KeywordMatch = Omit<KeywordCheckerResponse, 'future_trend' | 'insights' | 'recommendations'>;
+
+export type KeywordAnalysis = Pick<KeywordCheckerResponse, 'future_trend' | 'insights' | 'recommendations'>;
+
+export interface KeywordCheckerStreamHandlers {
+  onMatch: (match: KeywordMatch) => void;
+  onFutureTrend: (futureTrend: string) => void;
+  onAnalysis: (analysis: KeywordAnalysis) => void;
+}
+
 class ApiService {
   private async fetchData<T>(endpoint: string): Promise<T> {
     try {
@@ -162,6 +172,68 @@ class ApiService {
       throw error;
     }
   }
+
+  // Streams the keyword match first, then the AI analysis as Gemini generates it.
+  // Aborting the signal cancels the request and stops further handler calls.
+  async checkKeywordStream(
+    keyword: string,
+    handlers: KeywordCheckerStreamHandlers,
+    signal?: AbortSignal
+  ): Promise<void> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/keyword-checker/stream`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ keyword }),
+        signal,
+      });
+      
+      if (!response.ok || !response.body) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
+      }
+      
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let analysisReceived = false;
+      
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Server-Sent Events are separated by a blank line
+        const events = buffer.split('\n\n');
+        buffer = events.pop() ?? '';
+        
+        for (const rawEvent of events) {
+          if (signal?.aborted) return;
+          const event = rawEvent.match(/^event: (.*)$/m)?.[1];
+          const data = rawEvent.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue;
+          
+          const payload = JSON.parse(data);
+          if (event === 'match') handlers.onMatch(payload);
+          else if (event === 'future_trend') handlers.onFutureTrend(payload.future_trend);
+          else if (event === 'analysis') {
+            analysisReceived = true;
+            handlers.onAnalysis(payload);
+          }
+        }
+      }
+      
+      // A stream cut short (worker restart, proxy timeout) closes without the analysis event
+      if (!analysisReceived) {
+        throw new Error('The keyword analysis stream ended before the AI analysis arrived');
+      }
+    } catch (error) {
+      if (!signal?.aborted) console.error('Error streaming keyword check:', error);
+      throw error;
+    }
+  }
 }
 
 export const apiService = new ApiService();